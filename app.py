@@ -2,14 +2,27 @@
 import streamlit as st
 import pandas as pd
 from datetime import datetime
-from typing import Tuple, Dict, List, Optional
+from functools import lru_cache
+from typing import Any, Tuple, Dict, List, Optional
 import io
+import re
+import sys
 import zipfile
-import os
 
 # --- Configuration ---
 SUFFIXES = {"jr", "sr", "ii", "iii", "iv", "v", "md", "phd", "psyd", "do"}
 
+# Precompiled normalization patterns; the vectorized path reuses their
+# .pattern strings so pandas can hand them to the Arrow regex kernels
+_PUNCT_RE = re.compile(r"[.']")
+# Explicit class for every character str.split() treats as whitespace; RE2 (used
+# for Arrow strings) limits \s to ASCII, so \s would miss non-breaking spaces
+_SPACE_RE = re.compile(
+    "[\t\n\v\f\r\x1c-\x1f \x85\xa0\u1680\u2000-\u200a\u2028\u2029\u202f\u205f\u3000]+"
+)
+# Trailing run of suffix tokens in a normalized (single-spaced) name part
+_SUFFIX_RE = re.compile(r"(?:(?:^| )(?:" + "|".join(sorted(SUFFIXES)) + r"))+$")
+
 # Column positions for output Excel files (0-based)
 IDX_NAME = 0            # Column 1: "last Name, First Name"
 IDX_INSURANCE = 1       # Column 2: "insurance"
@@ -17,10 +30,96 @@ IDX_DATE = 2            # Column 3: "date of visit"
 IDX_STATUS = 3          # Column 4: "status"
 IDX_CODES = 6           # Column 7: "codes"
 
+# Trie over first-name tokens, one per last name:
+#   'children' - next character -> child node
+#   'data'     - (code, name) of the first entry whose token ends at this node;
+#                on the root, the first entry with no first name
+#   'first'    - (code, name) of the first entry whose token passes through this node
+TrieNode = Dict[str, Any]
+
+def new_trie_node() -> TrieNode:
+    return {'children': {}, 'data': None, 'first': None}
+
+def _is_missing(x) -> bool:
+    """Cheap scalar stand-in for pd.isna on values read from the uploads"""
+    return x is None or x is pd.NA or x is pd.NaT or (isinstance(x, float) and x != x)
+
+def _clean_spaces(s: str) -> str:
+    if _is_missing(s) or s == "":
+        return ""
+    s = str(s).strip().replace(" ,", ",")
+    return _SPACE_RE.sub(" ", s)
+
+# Names repeat heavily between the appointment and mutual files, so the
+# normalized form is cached rather than rebuilt for every occurrence
+@lru_cache(maxsize=100_000)
+def _normalize_basic(x) -> str:
+    if _is_missing(x):
+        return ""
+    s = _PUNCT_RE.sub("", _clean_spaces(str(x).strip().lower()))
+    return _SUFFIX_RE.sub("", _SPACE_RE.sub(" ", s).strip())
+
+# Patients recur across visits in a period; results are immutable tuples,
+# so repeated names are answered from the cache
+@lru_cache(maxsize=65536)
+def _parse_patient_name(name: str, format_hint: str) -> Tuple[str, str]:
+    if name == "":
+        return ("", "")
+
+    name = name.strip()
+
+    # Auto-detect format or use hint
+    if format_hint == "auto":
+        has_comma = ',' in name
+        format_to_use = "last_first" if has_comma else "first_last"
+    else:
+        format_to_use = format_hint
+
+    if format_to_use == "last_first":
+        # Format: "Last, First" or "Last,First"
+        if ',' in name:
+            parts = name.split(',', 1)
+            last_name = parts[0].strip()
+            first_name = parts[1].strip() if len(parts) > 1 else ""
+        else:
+            # No comma, treat as last name only
+            last_name = name
+            first_name = ""
+    else:
+        # Format: "First Last" or "First Middle Last"
+        parts = name.split()
+        if len(parts) == 0:
+            return ("", "")
+        elif len(parts) == 1:
+            # Single name - could be first or last
+            last_name = parts[0]
+            first_name = ""
+        else:
+            # Multiple parts - first part(s) are first/middle, last is surname
+            first_name = " ".join(parts[:-1])
+            last_name = parts[-1]
+
+    # Handle complex last names like "Russell (Kwon)"
+    if '(' in last_name:
+        # Extract the main last name before parentheses
+        main_last_name = last_name.split('(')[0].strip()
+        last_name = main_last_name
+
+    # Normalize and strip suffixes
+    last_name = _normalize_basic(last_name)
+    first_name = _normalize_basic(first_name)
+
+    # Extract first token from first name for matching
+    first_token = first_name.split()[0] if first_name else ""
+
+    return (sys.intern(last_name), sys.intern(first_token))
+
 class PatientProcessor:
     def __init__(self):
-        self.exact_map = {}
-        self.last_to_firsts = {}
+        self.mutual_index = pd.DataFrame(columns=['code', 'name'])
+        self.surname_rows: Dict[str, Any] = {}
+        self.mutual_entries = None
+        self.last_to_trie: Dict[str, TrieNode] = {}
         self.stats = {
             'total_appointments': 0,
             'matched_patients': 0,
@@ -29,26 +128,11 @@ class PatientProcessor:
     
     def clean_spaces(self, s: str) -> str:
         """Clean up spacing issues in strings"""
-        if pd.isna(s) or s == "":
-            return ""
-        s = str(s).strip()
-        s = s.replace(" ,", ",").replace(",  ", ", ").replace("  ", " ")
-        return " ".join(s.split())
+        return _clean_spaces(s)
     
     def normalize_basic(self, x) -> str:
-        """Basic normalization for string comparison"""
-        if pd.isna(x):
-            return ""
-        s = self.clean_spaces(str(x).strip().lower())
-        s = s.replace(".", "").replace("'", "")
-        return s
-    
-    def strip_suffixes(self, name_part: str) -> str:
-        """Remove common suffixes from name parts"""
-        parts = [p for p in name_part.split() if p]
-        while parts and parts[-1].lower() in SUFFIXES:
-            parts.pop()
-        return " ".join(parts)
+        """Basic normalization for string comparison, including suffix removal (cached across instances)"""
+        return _normalize_basic(x)
     
     def parse_patient_name(self, name: str, format_hint: str = "auto") -> Tuple[str, str]:
         """
@@ -57,89 +141,114 @@ class PatientProcessor:
         
         format_hint: "auto", "last_first" (Last, First), or "first_last" (First Last)
         """
-        if pd.isna(name) or name == "":
-            return ("", "")
-        
-        name = str(name).strip()
+        if not isinstance(name, str):
+            name = "" if _is_missing(name) else str(name)
+        return _parse_patient_name(name, format_hint)
+    
+    def normalize_names(self, names: pd.Series) -> pd.Series:
+        """Vectorized normalize_basic over a Series of name parts"""
+        s = names.str.strip().str.lower().str.replace(" ,", ",", regex=False)
+        s = s.str.replace(_SPACE_RE.pattern, " ", regex=True)
+        s = s.str.replace(_PUNCT_RE.pattern, "", regex=True)
+        s = s.str.replace(_SPACE_RE.pattern, " ", regex=True).str.strip()
+        return s.str.replace(_SUFFIX_RE.pattern, "", regex=True)
+    
+    def parse_patient_names(self, names: pd.Series, format_hint: str = "last_first") -> Tuple[pd.Series, pd.Series]:
+        """
+        Vectorized parse_patient_name over a whole column.
+        Returns (last_names, first_tokens) Series aligned with the input.
         
-        # Auto-detect format or use hint
-        if format_hint == "auto":
-            has_comma = ',' in name
-            format_to_use = "last_first" if has_comma else "first_last"
-        else:
-            format_to_use = format_hint
-        
-        if format_to_use == "last_first":
-            # Format: "Last, First" or "Last,First"
-            if ',' in name:
-                parts = name.split(',', 1)
-                last_name = parts[0].strip()
-                first_name = parts[1].strip() if len(parts) > 1 else ""
-            else:
-                # No comma, treat as last name only
-                last_name = name
-                first_name = ""
+        format_hint: "last_first" (Last, First) or "first_last" (First Last)
+        """
+        index = names.index
+        
+        # Patients recur across visits, so only distinct names are parsed and
+        # the results are mapped back through the factorized codes
+        codes, distinct = names.astype("string[pyarrow]").fillna("").factorize()
+        
+        # Arrow-backed strings run the whole pipeline in pyarrow.compute kernels
+        # (RE2 for the regex steps), whatever dtype the caller passed in
+        names = pd.Series(distinct, dtype="string[pyarrow]").str.strip()
+        
+        # Splits are regex replaces: str.partition has no Arrow kernel and
+        # falls back to a per-element Python loop
+        if format_hint == "last_first":
+            # Format: "Last, First" or "Last,First"; no comma means last name only
+            last_names = names.str.replace(r"(?s),.*", "", regex=True)
+            first_names = names.str.replace(r"^[^,]*,?", "", regex=True)
         else:
-            # Format: "First Last" or "First Middle Last"
-            parts = name.split()
-            if len(parts) == 0:
-                return ("", "")
-            elif len(parts) == 1:
-                # Single name - could be first or last
-                last_name = parts[0]
-                first_name = ""
-            else:
-                # Multiple parts - first part(s) are first/middle, last is surname
-                first_name = " ".join(parts[:-1])
-                last_name = parts[-1]
+            # Format: "First Last" or "First Middle Last"; a single word is the last name
+            names = names.str.replace(_SPACE_RE.pattern, " ", regex=True)
+            last_names = names.str.replace(r"^.* ", "", regex=True)
+            first_names = names.str.replace(r" ?[^ ]*$", "", regex=True)
         
         # Handle complex last names like "Russell (Kwon)"
-        if '(' in last_name:
-            # Extract the main last name before parentheses
-            main_last_name = last_name.split('(')[0].strip()
-            last_name = main_last_name
+        last_names = last_names.str.replace(r"(?s)\(.*", "", regex=True)
         
-        # Normalize and strip suffixes
-        last_name = self.strip_suffixes(self.normalize_basic(last_name))
-        first_name = self.strip_suffixes(self.normalize_basic(first_name))
+        last_names = self.normalize_names(last_names)
+        first_names = self.normalize_names(first_names)
         
         # Extract first token from first name for matching
-        first_token = first_name.split()[0] if first_name else ""
+        first_tokens = first_names.str.replace(r" .*", "", regex=True)
         
-        return (last_name, first_token)
-    
-    def names_prefix_match(self, a_first: str, b_first: str) -> bool:
-        """Check if either first name starts with the other"""
-        if not a_first or not b_first:
-            return False
-        return a_first.startswith(b_first) or b_first.startswith(a_first)
+        return (last_names.take(codes).set_axis(index), first_tokens.take(codes).set_axis(index))
     
     def build_mutual_index(self, mutual_df):
         """Build index structures for fast patient lookup"""
-        self.exact_map = {}
-        self.last_to_firsts = {}
+        self.surname_rows = {}
+        self.last_to_trie = {}
+        
+        # Mutual file has: name (Last, First), insurance code, insurance name
+        last, first_tok = self.parse_patient_names(mutual_df.iloc[:, 0], format_hint="last_first")
+        entries = pd.DataFrame({
+            'last': last,
+            'first': first_tok,
+            'code': mutual_df.iloc[:, 1].fillna("").astype(str),
+            'name': mutual_df.iloc[:, 2].fillna("").astype(str),
+        })
+        
+        # Skip rows without a valid last name
+        entries = entries[entries['last'] != ""]
+        
+        # First occurrence of a (last, first_token) pair wins
+        unique = entries.drop_duplicates(subset=['last', 'first'], keep='first')
+        
+        # Entries keyed by (last, first_token) for batched lookups
+        self.mutual_index = pd.DataFrame(
+            {'code': unique['code'].to_numpy(dtype=object), 'name': unique['name'].to_numpy(dtype=object)},
+            index=pd.MultiIndex.from_arrays([unique['last'], unique['first']]),
+        )
         
-        for _, row in mutual_df.iterrows():
-            # Assuming mutual file has: name (Last, First), insurance code, insurance name
-            # Parse with "last_first" format hint since mutual file uses "Last, First"
-            last, first_tok = self.parse_patient_name(row.iloc[0], format_hint="last_first")
-            
-            if not last:  # Skip if no valid last name
-                continue
-            
-            pair = (last, first_tok) if first_tok else (last, "")
-            
-            # Store insurance code (col 2) and insurance name (col 3)
-            insurance_code = str(row.iloc[1]) if not pd.isna(row.iloc[1]) else ""
-            insurance_name = str(row.iloc[2]) if not pd.isna(row.iloc[2]) else ""
-            
-            if pair not in self.exact_map:
-                self.exact_map[pair] = (insurance_code, insurance_name)
-            
-            if first_tok:
-                self.last_to_firsts.setdefault(last, []).append(
-                    (first_tok, (insurance_code, insurance_name))
-                )
+        # Row positions per surname; tries are only built for surnames a lookup reaches
+        self.surname_rows = unique.groupby('last', sort=False).indices
+        self.mutual_entries = unique[['first', 'code', 'name']].to_numpy(dtype=object)
+    
+    def get_trie(self, last: str) -> Optional[TrieNode]:
+        """Trie of first-name tokens for a last name, built on first use"""
+        root = self.last_to_trie.get(last)
+        if root is None:
+            rows = self.surname_rows.get(last)
+            if rows is None:
+                return None
+            # Last-name-only entries land on the trie root, so one trie holds
+            # every fallback level for a surname
+            root = self.last_to_trie[last] = new_trie_node()
+            for first_tok, code, name in self.mutual_entries[rows]:
+                self.insert_first_token(root, first_tok, (code, name))
+        return root
+    
+    def insert_first_token(self, root: TrieNode, first_tok: str, data: Tuple[str, str]):
+        """Add a first-name token to a last name's trie; earlier entries win"""
+        node = root
+        for ch in first_tok:
+            child = node['children'].get(ch)
+            if child is None:
+                child = node['children'][ch] = new_trie_node()
+            node = child
+            if node['first'] is None:
+                node['first'] = data
+        if node['data'] is None:
+            node['data'] = data
     
     def lookup_mutual(self, last: str, first_token: str) -> Tuple[Optional[str], Optional[str]]:
         """
@@ -149,36 +258,79 @@ class PatientProcessor:
         if not last:
             return (None, None)
         
-        # Try exact match first
-        pair = (last, first_token) if first_token else (last, "")
-        if pair in self.exact_map:
-            return self.exact_map[pair]
+        root = self.get_trie(last)
+        if root is None:
+            return (None, None)
         
-        # Try without first name
-        if first_token and (last, "") in self.exact_map:
-            return self.exact_map[(last, "")]
+        # Try exact match first: the node where first_token ends
+        node = root
+        for ch in first_token:
+            node = node['children'].get(ch)
+            if node is None:
+                break
+        else:
+            if node['data'] is not None:
+                return node['data']
         
-        # Try prefix matching on first names
         if first_token:
-            candidates = self.last_to_firsts.get(last, [])
-            best = None
-            best_len = -1
-            
-            for cand_first, data in candidates:
-                if self.names_prefix_match(first_token, cand_first):
-                    common_len = len(os.path.commonprefix([first_token, cand_first]))
-                    if common_len > best_len:
-                        best_len = common_len
-                        best = data
-            
+            # Try without first name (stored on the root), then prefix matching on first names
+            best = root['data'] or self.lookup_prefix(root, first_token)
             if best:
                 return best
         
         return (None, None)
     
+    def lookup_prefix(self, root: Optional[TrieNode], first_token: str) -> Optional[Tuple[str, str]]:
+        """
+        Match first_token against the first names stored in a last name's trie.
+        Longest common prefix wins: any token starting with first_token
+        beats a shorter token that first_token starts with.
+        """
+        if root is None:
+            return None
+        
+        node = root
+        best = None
+        for ch in first_token:
+            node = node['children'].get(ch)
+            if node is None:
+                return best
+            if node['data'] is not None:
+                best = node['data']
+        return node['first']
+    
+    def lookup_mutual_many(self, last: pd.Series, first_token: pd.Series) -> Tuple[pd.Series, pd.Series]:
+        """
+        Vectorized lookup_mutual over aligned last name / first token Series.
+        Returns (insurance_codes, insurance_names) with "" where there is no match.
+        """
+        no_first = [""] * len(last)
+        found = self.mutual_index.reindex(pd.MultiIndex.from_arrays([last, first_token]))
+        found = found.reset_index(drop=True)
+        
+        # Try without first name
+        fallback = self.mutual_index.reindex(pd.MultiIndex.from_arrays([last, no_first]))
+        found = found.fillna(fallback.reset_index(drop=True))
+        
+        # Prefix matching on first names, once per distinct remaining key
+        misses = found['code'].isna().to_numpy() & (first_token != "").to_numpy()
+        if misses.any():
+            keys = list(zip(last[misses], first_token[misses]))
+            prefix = {
+                key: self.lookup_prefix(self.get_trie(key[0]), key[1]) or (None, None)
+                for key in set(keys)
+            }
+            matches = [prefix[key] for key in keys]
+            found.loc[misses, 'code'] = [code for code, _ in matches]
+            found.loc[misses, 'name'] = [name for _, name in matches]
+        
+        codes = found['code'].fillna("").set_axis(last.index)
+        insurance = found['name'].fillna("").set_axis(last.index)
+        return (codes, insurance)
+    
     def format_date(self, val) -> str:
         """Format date as MM/DD/YYYY"""
-        if pd.isna(val):
+        if _is_missing(val):
             return ""
         
         try:
@@ -188,13 +340,23 @@ class PatientProcessor:
         except:
             return str(val)
     
+    def format_dates(self, values: pd.Series) -> pd.Series:
+        """
+        Column-wise format_date; unparseable values are passed through as text.
+        Visits share a handful of distinct timestamps, so each is parsed only once.
+        """
+        # Parse through format_date one value at a time: a single to_datetime call
+        # over the column raises on mixed UTC offsets (e.g. across a DST change)
+        values = values.fillna("").astype(str)
+        return values.map({v: self.format_date(v) for v in values.unique()})
+    
     def append_value(self, existing, new, sep=" | "):
         """Append new value to existing with separator, avoiding duplicates"""
-        if pd.isna(new) or str(new).strip() == "":
+        if _is_missing(new) or str(new).strip() == "":
             return existing
         
         new_s = str(new).strip()
-        if pd.isna(existing) or str(existing).strip() == "":
+        if _is_missing(existing) or str(existing).strip() == "":
             return new_s
         
         existing_s = str(existing).strip()
@@ -208,7 +370,7 @@ class PatientProcessor:
         """
         Process appointment status: remove 'Seen' but keep other statuses.
         """
-        if pd.isna(status) or status == "":
+        if _is_missing(status) or status == "":
             return ""
         
         status_str = str(status).strip()
@@ -220,6 +382,21 @@ class PatientProcessor:
         # Keep all other statuses (Pending, Canceled, etc.)
         return status_str
     
+    def process_statuses(self, statuses: pd.Series) -> pd.Series:
+        """Vectorized process_status"""
+        statuses = statuses.fillna("").astype(str).str.strip()
+        return statuses.where(statuses.str.lower() != "seen", "")
+    
+    def format_display_names(self, last: pd.Series, first: pd.Series, patients: pd.Series) -> pd.Series:
+        """
+        Format parsed names for output as "Last, First".
+        Both parts are single words here, so capitalize() matches per-word capitalization.
+        Rows without a last name keep the original patient text.
+        """
+        last_display = last.str.capitalize()
+        formatted = (last_display + ", " + first.str.capitalize()).where(first != "", last_display)
+        return formatted.where(last != "", patients.astype("string[pyarrow]").fillna(""))
+    
     def process_appointments(self, appointment_df, doctor_mapping: Dict[str, str]) -> Dict[str, pd.DataFrame]:
         """
         Process appointments and split by doctor.
@@ -227,60 +404,40 @@ class PatientProcessor:
         """
         doctor_dfs = {}
         
+        # Parse patient names (appointments use "First Last" format)
+        patients = appointment_df['Patient']
+        last, first = self.parse_patient_names(patients, format_hint="first_last")
+        
+        # Look up insurance and codes from mutual file
+        codes, insurance = self.lookup_mutual_many(last, first)
+        
+        matched = (codes != "") | (insurance != "")
+        
+        # Assemble the output columns once for all doctors
+        output = pd.DataFrame({
+            IDX_NAME: self.format_display_names(last, first, patients),
+            IDX_INSURANCE: insurance,
+            IDX_DATE: self.format_dates(appointment_df['AppointmentTime']),
+            IDX_STATUS: self.process_statuses(appointment_df['AppointmentStatus']),
+            IDX_CODES: codes,
+        }, index=appointment_df.index, columns=range(7)).fillna("")
+        
+        # Split the output frame by provider in a single pass
+        seen_by = appointment_df['SeenBy']
+        groups = dict(list(output.groupby(seen_by, sort=False)))
+        matched_counts = matched.groupby(seen_by, sort=False).sum()
+        
         for doctor_full, doctor_short in doctor_mapping.items():
-            # Filter appointments for this doctor
-            doctor_appointments = appointment_df[
-                appointment_df['SeenBy'] == doctor_full
-            ].copy()
-            
-            if len(doctor_appointments) == 0:
+            doctor_df = groups.get(doctor_full)
+            if doctor_df is None or doctor_df.empty:
                 continue
             
-            # Create output DataFrame with required columns
-            output_rows = []
-            matched_count = 0
-            
-            for _, apt in doctor_appointments.iterrows():
-                # Parse patient name (appointments use "First Last" format)
-                patient_name = apt['Patient']
-                last, first = self.parse_patient_name(patient_name, format_hint="first_last")
-                
-                # Format name for output (Last, First)
-                if last and first:
-                    # Capitalize properly for display
-                    last_display = " ".join(w.capitalize() for w in last.split())
-                    first_display = " ".join(w.capitalize() for w in first.split())
-                    formatted_name = f"{last_display}, {first_display}"
-                elif last:
-                    formatted_name = last.capitalize()
-                else:
-                    formatted_name = str(patient_name)
-                
-                # Look up insurance and codes from mutual file
-                codes, insurance = self.lookup_mutual(last, first)
-                
-                if codes or insurance:
-                    matched_count += 1
-                
-                # Prepare row data
-                row_data = [''] * 7  # Initialize with empty strings
-                
-                row_data[IDX_NAME] = formatted_name
-                row_data[IDX_INSURANCE] = insurance if insurance else ""
-                row_data[IDX_DATE] = self.format_date(apt['AppointmentTime'])
-                row_data[IDX_STATUS] = self.process_status(apt['AppointmentStatus'])
-                row_data[IDX_CODES] = codes if codes else ""
-                
-                output_rows.append(row_data)
-            
-            # Create DataFrame from rows
-            doctor_df = pd.DataFrame(output_rows)
-            doctor_dfs[doctor_short] = doctor_df
+            doctor_dfs[doctor_short] = doctor_df.reset_index(drop=True)
             
             # Update statistics
             self.stats['doctors_processed'][doctor_short] = {
-                'total': len(doctor_appointments),
-                'matched': matched_count
+                'total': len(doctor_df),
+                'matched': int(matched_counts[doctor_full])
             }
         
         return doctor_dfs
@@ -326,6 +483,11 @@ class PatientProcessor:
         
         return "\n".join(lines)
     
+    def write_xlsx(self, df: pd.DataFrame, target):
+        """Write an output DataFrame as XLSX to a writable file object"""
+        with pd.ExcelWriter(target, engine='xlsxwriter') as writer:
+            df.to_excel(writer, header=False, index=False)
+    
     def run(self, appointment_df: pd.DataFrame, mutual_df: pd.DataFrame, doctor_mapping: Dict[str, str], period_str: str):
         """Main processing function"""
         self.stats['total_appointments'] = len(appointment_df)
@@ -333,6 +495,9 @@ class PatientProcessor:
         # Select relevant columns from mutual_df
         mutual_df = mutual_df.iloc[:, [0, 1, 2]]
         
+        # Repeated patient rows can never win over the first one, so drop them before parsing
+        mutual_df = mutual_df.drop_duplicates(subset=mutual_df.columns[0], keep='first', ignore_index=True)
+        
         self.build_mutual_index(mutual_df)
         
         doctor_dfs = self.process_appointments(appointment_df, doctor_mapping)
@@ -340,15 +505,13 @@ class PatientProcessor:
         # Generate summary text
         summary_text = self.generate_summary(doctor_mapping, period_str)
         
-        # Create zip file in memory
+        # Create zip file in memory; XLSX is already compressed, so a light level is enough
         zip_output = io.BytesIO()
-        with zipfile.ZipFile(zip_output, 'w') as zipf:
+        with zipfile.ZipFile(zip_output, 'w', compression=zipfile.ZIP_DEFLATED, compresslevel=1) as zipf:
             for doctor_short, df in doctor_dfs.items():
-                excel_buf = io.BytesIO()
-                with pd.ExcelWriter(excel_buf, engine='openpyxl') as writer:
-                    df.to_excel(writer, header=False, index=False)
-                excel_buf.seek(0)
-                zipf.writestr(f"{doctor_short}_visits_{period_str}.xlsx", excel_buf.getvalue())
+                # Stream each workbook straight into its zip entry
+                with zipf.open(f"{doctor_short}_visits_{period_str}.xlsx", 'w') as entry:
+                    self.write_xlsx(df, entry)
             
             # Add summary to zip
             zipf.writestr(f"processing_summary_{period_str}.txt", summary_text.encode())
@@ -371,8 +534,15 @@ period_str = st.text_input("Period (e.g., 11_2025)", value="11_2025")
 mutual_sheet = "Active"  # Fixed sheet name, can be made configurable if needed
 
 if csv_file and xlsx_file:
-    appointment_df = pd.read_csv(csv_file, dtype=str)
-    mutual_df = pd.read_excel(xlsx_file, sheet_name=mutual_sheet, header=None, dtype=str, engine='openpyxl')
+    # Arrow-backed strings keep the .str pipeline in Arrow kernels instead of Python objects.
+    # The default C parser is kept: engine='pyarrow' infers types first and drops leading zeros.
+    appointment_df = pd.read_csv(csv_file, dtype="string[pyarrow]")
+    try:
+        # calamine parses the workbook natively instead of building the openpyxl object model
+        mutual_df = pd.read_excel(xlsx_file, sheet_name=mutual_sheet, header=None, dtype="string[pyarrow]", engine='calamine')
+    except ImportError:
+        xlsx_file.seek(0)
+        mutual_df = pd.read_excel(xlsx_file, sheet_name=mutual_sheet, header=None, dtype="string[pyarrow]", engine='openpyxl')
     
     unique_doctors = sorted(appointment_df['SeenBy'].unique())
     
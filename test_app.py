@@ -0,0 +1,106 @@
+import random
+
+import pandas as pd
+import pytest
+
+from app import PatientProcessor
+
+# Name fragments that exercise commas, suffixes, punctuation, parentheses
+# and the Unicode whitespace that RE2's \s does not cover
+ATOMS = [
+    "Smith", "do", "Jr", "jr.", "III", "ii", "v", "O'Neil", "Mc.Kay", "(Kwon)",
+    "Russell(Kwon)", ",", " , ", "  ", ".", "'", "Mary-Ann", "J.", "iv", "phd",
+    "Anne Marie", "St. John", "\t", "Do Jr", "\xa0", "Jr\xa0", " ", "　",
+    "\x85", "\x1c", " ", "\n", "a\nb,c",
+]
+
+
+def random_names(count, seed=0):
+    rng = random.Random(seed)
+    names = [None, "", ",", "  ,  ", " , Jr", "Jr, Jr", "Smith, John\xa0A", "John\xa0Smith"]
+    for _ in range(count):
+        parts = [rng.choice(ATOMS) + rng.choice([" ", ""]) for _ in range(rng.randint(1, 6))]
+        names.append("".join(parts))
+    return names
+
+
+def reference_lookup(entries, last, first):
+    """Brute-force lookup over (key, data) pairs in mutual file order"""
+    if not last:
+        return ("", "")
+    for key, data in entries:
+        if key == (last, first):
+            return data
+    if first:
+        for key, data in entries:
+            if key == (last, ""):
+                return data
+        best, best_len = None, -1
+        for (cand_last, cand_first), data in entries:
+            if cand_last != last or not cand_first:
+                continue
+            if cand_first.startswith(first) or first.startswith(cand_first):
+                common_len = min(len(cand_first), len(first))
+                if common_len > best_len:
+                    best, best_len = data, common_len
+        if best:
+            return best
+    return ("", "")
+
+
+@pytest.mark.parametrize("dtype", [object, "string[pyarrow]"])
+@pytest.mark.parametrize("format_hint", ["last_first", "first_last"])
+def test_parse_patient_names_matches_scalar(format_hint, dtype):
+    processor = PatientProcessor()
+    names = random_names(5000)
+    last, first = processor.parse_patient_names(pd.Series(names, dtype=dtype), format_hint=format_hint)
+
+    expected = [processor.parse_patient_name(name, format_hint=format_hint) for name in names]
+    assert list(zip(last, first)) == expected
+
+
+def test_lookup_mutual_many_matches_brute_force():
+    rng = random.Random(1)
+    processor = PatientProcessor()
+
+    for _ in range(20):
+        rows = []
+        for i in range(rng.randint(1, 60)):
+            last = rng.choice("xyz")
+            first = "".join(rng.choice("ab") for _ in range(rng.randint(0, 5)))
+            rows.append([f"{last}, {first}" if first else last, str(i), rng.choice("PQ")])
+        mutual_df = pd.DataFrame(rows)
+        processor.build_mutual_index(mutual_df)
+
+        entries = [
+            (processor.parse_patient_name(name, format_hint="last_first"), (code, insurance))
+            for name, code, insurance in rows
+        ]
+        entries = [(key, data) for key, data in entries if key[0]]
+
+        queries = [
+            (last, "".join(rng.choice("ab") for _ in range(rng.randint(0, 6))))
+            for last in "xyzw" for _ in range(50)
+        ] + [("", "a")]
+        codes, insurance = processor.lookup_mutual_many(
+            pd.Series([last for last, _ in queries]),
+            pd.Series([first for _, first in queries]),
+        )
+
+        for query, code, name in zip(queries, codes, insurance):
+            assert (code, name) == reference_lookup(entries, *query), query
+
+
+def test_format_dates_handles_mixed_utc_offsets():
+    processor = PatientProcessor()
+    values = pd.Series([
+        "2025-11-01T09:00:00-04:00",
+        "2025-11-03T09:00:00-05:00",
+        "2025-11-04 10:00",
+        None,
+        "garbage",
+    ])
+
+    assert processor.format_dates(values).tolist() == [
+        "11/01/2025", "11/03/2025", "11/04/2025", "", "garbage"
+    ]